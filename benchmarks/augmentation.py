@@ -0,0 +1,125 @@
+"""Compare augmentation configurations by training throughput and accuracy.
+
+Each configuration is written as VARIANTSxJITTERS (for example ``4x2`` is
+four augmented variants per image, each encoded with ``num_jitters=2``).
+The stored faces in a local_storage-style dataset are split per person into
+train and test images with a fixed seed; every configuration is trained on
+the same split and scored by identifying the held-out test faces:
+
+    python benchmarks/augmentation.py --dataset local_storage --configs 1x10,4x2,8x1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from face_core import (  # noqa: E402
+    MATCH_TOLERANCE, AugmentationConfig, augment_batch, encode_faces, list_training_images, load_image_file, match_face,
+    train_encodings
+)
+
+def split_dataset(images, test_fraction, seed):
+    """Split (person_name, image_path) pairs into train and test sets, per person."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    by_person = {}
+    for person_name, image_path in images:
+        by_person.setdefault(person_name, []).append(image_path)
+
+    train, test = [], []
+    for person_name, paths in sorted(by_person.items()):
+        order = rng.permutation(len(paths))
+        n_test = int(len(paths) * test_fraction) if len(paths) > 1 else 0
+        for rank, index in enumerate(order):
+            (test if rank < n_test else train).append((person_name, paths[index]))
+    return train, test
+
+def parse_configs(text, seed):
+    configs = []
+    for item in text.split(","):
+        variants, jitters = item.lower().split("x")
+        configs.append(AugmentationConfig(n_variants=int(variants), num_jitters=int(jitters), seed=seed))
+    return configs
+
+def identification_accuracy(model, test_encodings, tolerance=MATCH_TOLERANCE):
+    """Fraction of (person_name, encoding) test pairs matched to the right person."""
+    known_face_encodings, known_face_names = model
+    if not test_encodings:
+        return None
+    correct = sum(
+        1 for person_name, encoding in test_encodings
+        if match_face(known_face_encodings, known_face_names, encoding, tolerance)[0] == person_name
+    )
+    return correct / len(test_encodings)
+
+def benchmark_config(config, train, test_encodings):
+    import numpy as np
+
+    # Augmentation alone, to separate the vectorized stage from dlib encoding
+    rng = np.random.default_rng(config.seed)
+    start = time.perf_counter()
+    for _, image_path in train:
+        augment_batch(load_image_file(image_path), config, rng)
+    augment_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    known_face_encodings, known_face_names = train_encodings(config=config, images=train)
+    train_seconds = time.perf_counter() - start
+
+    return {
+        "n_variants": config.n_variants,
+        "num_jitters": config.num_jitters,
+        "encodings": len(known_face_encodings),
+        "augment_seconds": round(augment_seconds, 3),
+        "train_seconds": round(train_seconds, 3),
+        "encodings_per_second": round(len(known_face_encodings) / train_seconds, 2) if train_seconds else None,
+        "accuracy": identification_accuracy((known_face_encodings, known_face_names), test_encodings),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=os.path.join(REPO_ROOT, "local_storage"))
+    parser.add_argument("--configs", default="1x10,2x5,4x2,8x1")
+    parser.add_argument("--test-fraction", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    images = list_training_images(args.dataset)
+    if not images:
+        print(f"Error: No face images found in {args.dataset}.")
+        return 1
+    train, test = split_dataset(images, args.test_fraction, args.seed)
+
+    # Test faces are encoded once, without augmentation, and shared by every configuration
+    test_encodings = []
+    for person_name, image_path in test:
+        for encoding in encode_faces(load_image_file(image_path)):
+            test_encodings.append((person_name, encoding))
+
+    results = []
+    for config in parse_configs(args.configs, args.seed):
+        result = benchmark_config(config, train, test_encodings)
+        results.append(result)
+        accuracy = "n/a" if result["accuracy"] is None else f"{result['accuracy']:.3f}"
+        print(f"{config.n_variants}x{config.num_jitters}: {result['encodings_per_second']} enc/s, accuracy {accuracy}")
+
+    report = {
+        "dataset": os.path.abspath(args.dataset),
+        "train_images": len(train),
+        "test_faces": len(test_encodings),
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,166 @@
+"""Generate a small labelled face set and video for offline benchmarks.
+
+The faces come from photos bundled with scikit-image (only needed here):
+the astronaut portrait plus the LFW subset faces, upscaled. Each source face
+is one identity. Its images are seeded variations in scale, rotation,
+position, exposure, blur and noise. TAR therefore measures robustness to
+capture conditions, not true same-person variation such as pose or age.
+The video moves two of the identities across a 640x480 frame with changing
+brightness. The faces are large enough to survive the default 0.25 resize,
+so every frame runs detection, encoding and matching.
+
+The output is deterministic for a given seed and is reused until the
+parameters change:
+
+    python benchmarks/fixture.py --output benchmarks/fixture
+"""
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from face_core import detect_faces  # noqa: E402
+
+DEFAULT_FIXTURE_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixture")
+FIXTURE_VERSION = 1
+FACE_SIZE = 160
+FRAME_WIDTH, FRAME_HEIGHT = 640, 480
+VIDEO_FACE_SIZE = 240
+# Astronaut face region in skimage's 512x512 astronaut.png, as (top, bottom, left, right)
+ASTRONAUT_FACE_CROP = (65, 185, 158, 278)
+
+def source_faces(identities):
+    """Return up to ``identities`` (name, RGB face) pairs that the detector can find."""
+    try:
+        from skimage import data
+    except ImportError as e:
+        raise RuntimeError(f"The benchmark fixture needs scikit-image ({e}): pip install scikit-image")
+    import cv2
+    import numpy as np
+
+    top, bottom, left, right = ASTRONAUT_FACE_CROP
+    candidates = [("astronaut", data.astronaut()[top:bottom, left:right])]
+    # The first 100 LFW subset images are faces, the rest are not
+    for index, face in enumerate(data.lfw_subset()[:100]):
+        gray = (face * 255).astype(np.uint8)
+        candidates.append((f"lfw_{index:03d}", cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)))
+
+    faces = []
+    for name, face in candidates:
+        face = cv2.resize(face, (FACE_SIZE, FACE_SIZE), interpolation=cv2.INTER_CUBIC)
+        if detect_faces(face):
+            faces.append((name, face))
+        if len(faces) == identities:
+            break
+    return faces
+
+def face_variant(face, rng):
+    """One seeded capture-condition variation of an RGB face, on a wider canvas."""
+    import cv2
+    import numpy as np
+
+    canvas = int(FACE_SIZE * 1.6)
+    offset = (canvas - FACE_SIZE) / 2
+    matrix = cv2.getRotationMatrix2D(
+        (FACE_SIZE / 2 + rng.uniform(-8, 8), FACE_SIZE / 2 + rng.uniform(-8, 8)),
+        rng.uniform(-10, 10), rng.uniform(0.85, 1.1)
+    )
+    matrix[:, 2] += offset
+    image = cv2.warpAffine(face, matrix, (canvas, canvas), borderMode=cv2.BORDER_REPLICATE)
+    if rng.random() < 0.3:
+        image = cv2.GaussianBlur(image, (3, 3), 0)
+    image = image.astype(np.float32) * rng.uniform(0.8, 1.2) + rng.uniform(-25, 25)
+    image += rng.normal(0, rng.uniform(0, 6), size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+def write_dataset(path, faces, images_per_identity, rng):
+    """Write a local_storage-style dataset: one directory of PNGs per identity."""
+    import cv2
+
+    for name, face in faces:
+        person_dir = os.path.join(path, name)
+        os.makedirs(person_dir, exist_ok=True)
+        for index in range(images_per_identity):
+            image = face_variant(face, rng)
+            cv2.imwrite(os.path.join(person_dir, f"{index}.png"), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+
+def write_video(path, faces, frames):
+    """Write an MJPG clip of the given faces drifting across a dark frame."""
+    import cv2
+    import numpy as np
+
+    tiles = [
+        cv2.cvtColor(cv2.resize(face, (VIDEO_FACE_SIZE, VIDEO_FACE_SIZE)), cv2.COLOR_RGB2BGR)
+        for _, face in faces
+    ]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (FRAME_WIDTH, FRAME_HEIGHT))
+    span_x = FRAME_WIDTH // len(tiles) - VIDEO_FACE_SIZE
+    span_y = FRAME_HEIGHT - VIDEO_FACE_SIZE
+    try:
+        for index in range(frames):
+            frame = np.full((FRAME_HEIGHT, FRAME_WIDTH, 3), 40, np.uint8)
+            for slot, tile in enumerate(tiles):
+                x = slot * FRAME_WIDTH // len(tiles) + int(span_x * (0.5 + 0.5 * np.sin(index / 25 + slot)))
+                y = int(span_y * (0.5 + 0.5 * np.cos(index / 35 + slot)))
+                frame[y:y + VIDEO_FACE_SIZE, x:x + VIDEO_FACE_SIZE] = tile
+            shift = int(25 * np.sin(index / 17))
+            writer.write(np.clip(frame.astype(np.int16) + shift, 0, 255).astype(np.uint8))
+    finally:
+        writer.release()
+
+def ensure_fixture(directory=DEFAULT_FIXTURE_DIR, identities=12, images_per_identity=7, frames=150, seed=0):
+    """Build the fixture in ``directory`` unless it already matches the parameters.
+
+    Returns (dataset_path, video_path).
+    """
+    import numpy as np
+
+    parameters = {
+        "version": FIXTURE_VERSION,
+        "identities": identities,
+        "images_per_identity": images_per_identity,
+        "frames": frames,
+        "seed": seed,
+    }
+    dataset_path = os.path.join(directory, "dataset")
+    video_path = os.path.join(directory, "clip.avi")
+    manifest_path = os.path.join(directory, "fixture.json")
+    try:
+        with open(manifest_path) as f:
+            if json.load(f) == parameters:
+                return dataset_path, video_path
+    except (OSError, ValueError):
+        pass
+
+    import shutil
+
+    shutil.rmtree(directory, ignore_errors=True)
+    faces = source_faces(identities)
+    write_dataset(dataset_path, faces, images_per_identity, np.random.default_rng(seed))
+    write_video(video_path, faces[:2], frames)
+    with open(manifest_path, "w") as f:
+        json.dump(parameters, f, indent=2)
+    return dataset_path, video_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_FIXTURE_DIR, help="directory to write the fixture to")
+    parser.add_argument("--identities", type=int, default=12)
+    parser.add_argument("--images", type=int, default=7, help="images per identity")
+    parser.add_argument("--frames", type=int, default=150, help="video length in frames")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        dataset_path, video_path = ensure_fixture(args.output, args.identities, args.images, args.frames, args.seed)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Dataset: {dataset_path}\nVideo: {video_path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Measure cold-start import cost of the headless modules with ``-X importtime``.
+
+Each module is imported in a fresh interpreter several times; the median
+cumulative import time and the heaviest transitive imports are reported.
+The compared figures (cumulative time and module count) can be written as
+JSON and checked against a previous run; a module missing from the baseline
+fails the check. The tracked baseline lives in ``benchmarks/importtime.json``;
+refresh it with ``--output`` when an intentional change moves the numbers:
+
+    python benchmarks/importtime.py --baseline benchmarks/importtime.json
+    python benchmarks/importtime.py --output benchmarks/importtime.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["events", "face_core", "sos", "server"]
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from ``-X importtime`` output."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def measure_module(module, repeat=5, top=10):
+    """Import ``module`` ``repeat`` times in fresh interpreters and summarise."""
+    cumulative = []
+    last_timings = {}
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        last_timings = parse_importtime(result.stderr)
+        cumulative.append(last_timings[module][1])
+
+    heaviest = sorted(last_timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "module": module,
+        "cumulative_ms": round(statistics.median(cumulative) / 1000, 2),
+        "imported_modules": len(last_timings),
+        "heaviest": [{"module": name, "self_ms": round(self_us / 1000, 2)} for name, (self_us, _) in heaviest],
+    }
+
+def compare(results, baseline, max_regression):
+    """Print per-module deltas; returns False if any module regressed past the limit.
+
+    Pulling in more modules than the baseline also fails: unlike the timing,
+    the count is not affected by machine noise. So does a module that failed
+    to import or has no usable baseline entry.
+    """
+    previous = {r["module"]: r for r in baseline["results"]}
+    ok = True
+    for result in results:
+        before = previous.get(result["module"])
+        if "error" in result:
+            ok = False
+            continue
+        if not before or "error" in before:
+            print(f"{result['module']}: no baseline, record one with --output")
+            ok = False
+            continue
+        delta = (result["cumulative_ms"] - before["cumulative_ms"]) / before["cumulative_ms"] * 100
+        extra_modules = result["imported_modules"] - before["imported_modules"]
+        print(
+            f"{result['module']}: {before['cumulative_ms']} ms -> {result['cumulative_ms']} ms ({delta:+.1f}%), "
+            f"{before['imported_modules']} -> {result['imported_modules']} modules"
+        )
+        if delta > max_regression or extra_modules > 0:
+            ok = False
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of heaviest imports to list")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON file from a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    results = [measure_module(module, args.repeat, args.top) for module in args.modules]
+    report = {"python": sys.version.split()[0], "results": results}
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']}: failed ({result['error']})")
+            continue
+        print(f"{result['module']}: {result['cumulative_ms']} ms, {result['imported_modules']} modules")
+        for item in result["heaviest"]:
+            print(f"  {item['self_ms']:>8} ms  {item['module']}")
+
+    if args.output:
+        # Only the compared figures; the heaviest imports are machine-specific detail
+        compared = [{k: v for k, v in r.items() if k != "heaviest"} for r in results]
+        with open(args.output, "w") as f:
+            json.dump({**report, "results": compared}, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if not compare(results, json.load(f), args.max_regression):
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
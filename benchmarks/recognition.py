@@ -0,0 +1,367 @@
+"""End-to-end benchmark and accuracy suite for the recognition stack.
+
+Runs offline on CPU and writes machine-readable results so runs can be
+compared across commits. Three parts:
+
+* matching: throughput and TAR/FAR/identification accuracy on a seeded
+  synthetic set of 128-d encodings, large enough to load the matcher;
+* dataset: detection, encoding and training throughput plus TAR/FAR and
+  identification accuracy on a local_storage-style labelled face set;
+* video: per-frame latency percentiles through ``recognize_frame`` on a
+  recorded video.
+
+Without ``--dataset`` or ``--video``, the generated fixture from
+``benchmarks/fixture.py`` is used (this needs scikit-image), so a bare run
+measures the whole pipeline on real faces.
+
+Peak process memory is reported for the whole run; ``--trace-memory`` adds
+the Python-level peak from tracemalloc at the cost of slower timings. Run
+once with ``FIRELINX_METRICS=0`` and compare against a default run to
+measure the instrumentation overhead. Example:
+
+    python benchmarks/recognition.py --output bench.json
+    python benchmarks/recognition.py --baseline bench.json
+    python benchmarks/recognition.py --dataset local_storage --video clip.mp4
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import metrics  # noqa: E402
+from augmentation import identification_accuracy, split_dataset  # noqa: E402
+from fixture import DEFAULT_FIXTURE_DIR, ensure_fixture  # noqa: E402
+from face_core import (  # noqa: E402
+    MATCH_TOLERANCE, RESIZE_FACTOR, AugmentationConfig, detect_faces, encode_faces,
+    list_training_images, load_image_file, match_face, recognize_frame, train_encodings
+)
+
+# Metrics compared against a baseline, by dotted path, and whether higher is better.
+# Counts such as frames or probes depend on the inputs and are deliberately left out.
+# Rates (the RATE_METRICS names) are compared by absolute difference, everything
+# else by relative change.
+COMPARED_METRICS = {
+    "matching.matches_per_second": True,
+    "matching.per_match_ms": False,
+    "matching.tar": True,
+    "matching.far": False,
+    "matching.identification_accuracy": True,
+    "dataset.detection.p50_ms": False,
+    "dataset.detection.p90_ms": False,
+    "dataset.detection.p99_ms": False,
+    "dataset.encoding_per_face.p50_ms": False,
+    "dataset.encoding_per_face.p90_ms": False,
+    "dataset.encoding_per_face.p99_ms": False,
+    "dataset.train_images_per_second": True,
+    "dataset.tar": True,
+    "dataset.far": False,
+    "dataset.identification_accuracy": True,
+    "video.frames_per_second": True,
+    "video.latency.p50_ms": False,
+    "video.latency.p90_ms": False,
+    "video.latency.p99_ms": False,
+    "memory.process_peak_rss_mb": False,
+    "memory.python_peak_mb": False,
+}
+RATE_METRICS = {"tar", "far", "identification_accuracy"}
+
+def percentiles(samples_ms):
+    import numpy as np
+
+    if not samples_ms:
+        return {}
+    p50, p90, p99 = np.percentile(samples_ms, [50, 90, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(max(samples_ms)), 3),
+    }
+
+def verification_rates(gallery, probes, tolerance):
+    """Return (TAR, FAR) for (person_name, encoding) probes against a gallery.
+
+    Each probe is compared with the closest gallery encoding of every enrolled
+    identity: a genuine attempt is its own identity, an impostor attempt any
+    other. An attempt is accepted when the distance is within ``tolerance``.
+    """
+    import numpy as np
+
+    known_face_encodings, known_face_names = gallery
+    encodings = np.asarray(known_face_encodings)
+    names = np.asarray(known_face_names)
+    identities = sorted(set(known_face_names))
+
+    genuine_accepted = genuine = impostor_accepted = impostor = 0
+    for person_name, encoding in probes:
+        distances = np.linalg.norm(encodings - encoding, axis=1)
+        for identity in identities:
+            accepted = distances[names == identity].min() <= tolerance
+            if identity == person_name:
+                genuine += 1
+                genuine_accepted += accepted
+            else:
+                impostor += 1
+                impostor_accepted += accepted
+
+    tar = float(genuine_accepted / genuine) if genuine else None
+    far = float(impostor_accepted / impostor) if impostor else None
+    return tar, far
+
+def accuracy_metrics(gallery, probes, tolerance):
+    tar, far = verification_rates(gallery, probes, tolerance)
+    return {
+        "tar": tar,
+        "far": far,
+        "identification_accuracy": identification_accuracy(gallery, probes, tolerance),
+        "probes": len(probes),
+    }
+
+def synthetic_encodings(identities, samples, seed):
+    """Seeded clusters of 128-d vectors with dlib-like same/different person distances.
+
+    Identity centres are about 0.9 apart. Each sample gets its own noise
+    level, so same-person distances spread over roughly 0.3 to 0.8 the way
+    good and poor captures do with dlib's encoder.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(2 * 128)
+    centres = rng.normal(0, 0.9 * scale, size=(identities, 128))
+    data = []
+    for index, centre in enumerate(centres):
+        noise = rng.normal(0, 1, size=(samples, 128)) * rng.uniform(0.2, 0.8, size=(samples, 1)) * scale
+        for encoding in centre + noise:
+            data.append((f"person_{index}", encoding))
+    return data
+
+def bench_matching(args):
+    data = synthetic_encodings(args.identities, args.samples, args.seed)
+    gallery_pairs, probes = [], []
+    for index, pair in enumerate(data):
+        (probes if index % args.samples == 0 else gallery_pairs).append(pair)
+    gallery = ([e for _, e in gallery_pairs], [n for n, _ in gallery_pairs])
+
+    start = time.perf_counter()
+    for _, encoding in probes:
+        match_face(gallery[0], gallery[1], encoding, args.tolerance)
+    seconds = time.perf_counter() - start
+
+    result = {
+        "gallery_size": len(gallery_pairs),
+        "matches_per_second": round(len(probes) / seconds, 2) if seconds else None,
+        "per_match_ms": round(seconds / len(probes) * 1000, 4),
+    }
+    result.update(accuracy_metrics(gallery, probes, args.tolerance))
+    return result
+
+def bench_dataset(args):
+    images = list_training_images(args.dataset)
+    if not images:
+        return None, {"error": f"No face images found in {args.dataset}"}
+    train, test = split_dataset(images, args.test_fraction, args.seed)
+
+    detect_ms, encode_ms, probes = [], [], []
+    for person_name, image_path in test:
+        image = load_image_file(image_path)
+        start = time.perf_counter()
+        face_locations = detect_faces(image)
+        detect_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        face_encodings = encode_faces(image, face_locations)
+        if face_encodings:
+            encode_ms.append((time.perf_counter() - start) * 1000 / len(face_encodings))
+        probes.extend((person_name, encoding) for encoding in face_encodings)
+
+    config = AugmentationConfig(n_variants=args.variants, num_jitters=args.num_jitters, seed=args.seed)
+    start = time.perf_counter()
+    gallery = train_encodings(config=config, images=train)
+    train_seconds = time.perf_counter() - start
+
+    result = {
+        "train_images": len(train),
+        "test_images": len(test),
+        "detection": percentiles(detect_ms),
+        "encoding_per_face": percentiles(encode_ms),
+        "train_seconds": round(train_seconds, 3),
+        "train_images_per_second": round(len(train) / train_seconds, 2) if train_seconds else None,
+        "gallery_size": len(gallery[0]),
+    }
+    if gallery[0]:
+        result.update(accuracy_metrics(gallery, probes, args.tolerance))
+    return gallery, result
+
+def read_frames(args):
+    """Yield up to ``args.frames`` BGR frames from the video."""
+    import cv2
+
+    cap = cv2.VideoCapture(args.video)
+    count = 0
+    while count < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+        count += 1
+    cap.release()
+
+def bench_video(args, gallery):
+    # Like the live webcam loop, every frame goes through recognition
+    frame_ms, recognized = [], 0
+    for frame in read_frames(args):
+        start = time.perf_counter()
+        results = recognize_frame(frame, gallery, args.resize_factor, args.tolerance)
+        frame_ms.append((time.perf_counter() - start) * 1000)
+        recognized += sum(1 for _, name, _ in results if name != "Unknown")
+
+    total_seconds = sum(frame_ms) / 1000
+    return {
+        "source": args.video,
+        "frames": len(frame_ms),
+        "frames_per_second": round(len(frame_ms) / total_seconds, 2) if total_seconds else None,
+        "faces_recognized": recognized,
+        "latency": percentiles(frame_ms),
+    }
+
+def peak_memory():
+    result = {}
+    if tracemalloc.is_tracing():
+        _, traced_peak = tracemalloc.get_traced_memory()
+        result["python_peak_mb"] = round(traced_peak / 2 ** 20, 2)
+    try:
+        import resource
+    except ImportError:  # Windows
+        return result
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    result["process_peak_rss_mb"] = round(maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 2)
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(results, baseline, max_regression, max_rate_change):
+    """Print metric changes against a baseline; returns False on any regression past the limit.
+
+    Rates are judged by absolute change against ``max_rate_change``, others by
+    percent change against ``max_regression``; a worsening from a zero
+    baseline always counts as a regression.
+    """
+    current, previous = flatten(results), flatten(baseline["results"])
+    ok = True
+    for name, higher_is_better in COMPARED_METRICS.items():
+        if name not in current or name not in previous:
+            continue
+        before, after = previous[name], current[name]
+        if name.rsplit(".", 1)[-1] in RATE_METRICS:
+            change, limit, text = after - before, max_rate_change, f"{after - before:+.3f}"
+        elif before:
+            change = (after - before) / abs(before) * 100
+            limit, text = max_regression, f"{change:+.1f}%"
+        else:
+            change = 0.0 if after == before else float("inf") if after > before else float("-inf")
+            limit, text = max_regression, "from zero"
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > limit:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{name}: {before} -> {after} ({text}){flag}")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", help="local_storage-style directory of labelled face images")
+    parser.add_argument("--video", help="recorded video for per-frame latency")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR, help="where the generated fixture is kept")
+    parser.add_argument("--frames", type=int, default=300, help="maximum frames to process")
+    parser.add_argument("--identities", type=int, default=50, help="synthetic identities for matching")
+    parser.add_argument("--samples", type=int, default=20, help="synthetic encodings per identity")
+    parser.add_argument("--resize-factor", type=float, default=RESIZE_FACTOR)
+    parser.add_argument("--num-jitters", type=int, default=10)
+    parser.add_argument("--variants", type=int, default=1, help="augmented variants per training image")
+    parser.add_argument("--tolerance", type=float, default=MATCH_TOLERANCE)
+    parser.add_argument("--test-fraction", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peak (slows timings)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON file from a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed regression in percent")
+    parser.add_argument(
+        "--max-rate-change", type=float, default=0.02, help="allowed absolute drop in TAR/accuracy or rise in FAR"
+    )
+    args = parser.parse_args(argv)
+    if args.samples < 2:
+        parser.error("--samples must be at least 2: one probe plus a gallery encoding per identity")
+
+    if not args.dataset or not args.video:
+        try:
+            dataset, video = ensure_fixture(args.fixture_dir, seed=args.seed)
+        except RuntimeError as e:
+            print(f"Error: {e}, or pass --dataset and --video")
+            return 1
+        args.dataset = args.dataset or dataset
+        args.video = args.video or video
+
+    if args.trace_memory:
+        tracemalloc.start()
+    results = {"matching": bench_matching(args)}
+
+    gallery, results["dataset"] = bench_dataset(args)
+    if not gallery or not gallery[0]:
+        data = synthetic_encodings(args.identities, args.samples, args.seed)
+        gallery = ([e for _, e in data], [n for n, _ in data])
+    results["video"] = bench_video(args, gallery)
+    results["memory"] = peak_memory()
+    tracemalloc.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "metrics_enabled": metrics.ENABLED,
+        "parameters": {
+            k: v for k, v in vars(args).items()
+            if k not in ("output", "baseline", "max_regression", "max_rate_change", "fixture_dir")
+        },
+        "results": results,
+    }
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if not compare(results, json.load(f), args.max_regression, args.max_rate_change):
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,99 +1,19 @@
 import sys
 import os
-os.environ["ALBUMENTATIONS_DISABLE_VERSION_CHECK"] = "1"
 import cv2
-import face_recognition
-import numpy as np
-import pickle
-import albumentations as A
-from tqdm import tqdm
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QLineEdit, QVBoxLayout, QHBoxLayout, QWidget, QProgressBar,
     QComboBox, QMessageBox, QFrame, QDialog, QFileDialog
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap, QColor, QLinearGradient, QBrush, QFont
-from PIL import Image, ImageOps
 from threading import Thread
-import io
-
-# Constants
-MODEL_PATH = "models/face_encodings.pkl"
-LOCAL_STORAGE_PATH = "local_storage"
-
-if not os.path.exists("models"):
-    os.makedirs("models")
-
-if not os.path.exists(LOCAL_STORAGE_PATH):
-    os.makedirs(LOCAL_STORAGE_PATH)
-
-def save_image_locally(image, destination_path):
-    """Saves an image to the local storage."""
-    try:
-        if image is None or not isinstance(image, np.ndarray):
-            print("Error: Invalid image provided for save.")
-            return
-
-        _, img_encoded = cv2.imencode(".jpg", image)
-        if img_encoded is None:
-            print("Error: Failed to encode image.")
-            return
-
-        with open(destination_path, "wb") as f:
-            f.write(img_encoded.tobytes())
-        print(f"Image saved to {destination_path}.")
-    except Exception as e:
-        print(f"Error saving image: {e}")
-
-def load_image_locally(image_path):
-    """Loads an image from the local storage."""
-    try:
-        with open(image_path, "rb") as f:
-            img_bytes = f.read()
-        img_array = np.frombuffer(img_bytes, dtype=np.uint8)
-        image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        return image
-    except Exception as e:
-        print(f"Error loading image: {e}")
-        return None
-
-def adjust_brightness(image, target_brightness=128):
-    """Adjust image brightness to a target level."""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    current_brightness = gray.mean()
-    ratio = target_brightness / current_brightness
-    adjusted_image = cv2.convertScaleAbs(image, alpha=ratio, beta=0)
-    return adjusted_image
-
-def align_face(image, face_location):
-    """Align face using facial landmarks."""
-    top, right, bottom, left = face_location
-    face_image = image[top:bottom, left:right]
-    landmarks = face_recognition.face_landmarks(face_image)
-    if not landmarks:
-        return face_image
-    landmarks = landmarks[0]
-    nose_bridge = landmarks["nose_bridge"]
-    dx = nose_bridge[-1][0] - nose_bridge[0][0]
-    dy = nose_bridge[-1][1] - nose_bridge[0][1]
-    angle = np.degrees(np.arctan2(dy, dx))
-    aligned_image = Image.fromarray(face_image)
-    aligned_image = ImageOps.exif_transpose(aligned_image.rotate(-angle))
-    return np.array(aligned_image)
-
-# Advanced Data Augmentation
-augmenter = A.Compose([
-    A.HorizontalFlip(p=0.5),
-    A.Rotate(limit=20, p=0.5),
-    A.GaussianBlur(blur_limit=(0, 1.0), p=0.5),
-    A.GaussNoise(var_limit=(10.0, 50.0), p=0.5),
-    A.RandomBrightnessContrast(p=0.5),
-    A.CLAHE(p=0.5)
-])
-
-def augment_image(image):
-    augmented = augmenter(image=image)
-    return augmented["image"]
+from metrics import dump_json, dump_to_env_file, inc, maybe_start_profiler, timer
+from face_core import (
+    MODEL_PATH, LOCAL_STORAGE_PATH, FACE_DETECTION_INTERVAL, FaceTracker, adjust_brightness, align_face, detect_faces,
+    ensure_storage_dirs, list_persons, load_image_file, load_model, load_person_details, publish_recognition,
+    recognize_frame, recognize_image, save_image_locally, save_model, train_encodings
+)
 
 class CaptureThread(QThread):
     update_frame = pyqtSignal(QImage)
@@ -122,22 +42,25 @@ class CaptureThread(QThread):
 
         count = 0
         total_faces = 100
-        face_detection_interval = 5
+        face_detection_interval = FACE_DETECTION_INTERVAL
         frame_count = 0
 
         while self.running and count < total_faces:
-            ret, frame = cap.read()
+            with timer("frame_grab"):
+                ret, frame = cap.read()
             if not ret:
+                inc("capture_failures")
                 self.update_status.emit("Error: Failed to capture image.")
                 break
 
             frame = adjust_brightness(frame)
 
             if frame_count % face_detection_interval == 0:
-                face_locations = face_recognition.face_locations(frame)
+                face_locations = detect_faces(frame)
                 if face_locations:
                     for top, right, bottom, left in face_locations:
-                        aligned_face = align_face(frame, (top, right, bottom, left))
+                        with timer("align"):
+                            aligned_face = align_face(frame, (top, right, bottom, left))
                         image_path = os.path.join(LOCAL_STORAGE_PATH, self.person_name, f"{count + 1}.jpg")
                         os.makedirs(os.path.dirname(image_path), exist_ok=True)
                         Thread(target=save_image_locally, args=(aligned_face, image_path), daemon=True).start()
@@ -146,11 +69,12 @@ class CaptureThread(QThread):
                         self.update_progress.emit(count)
                         self.update_status.emit(f"Faces Captured: {count}/{total_faces} | Status: Face Detected")
 
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = frame.shape
-            bytes_per_line = ch * w
-            q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.update_frame.emit(q_img)
+            with timer("render"):
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                h, w, ch = frame.shape
+                bytes_per_line = ch * w
+                q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+                self.update_frame.emit(q_img)
 
             frame_count += 1
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -353,38 +277,16 @@ class FaceCaptureApp(QMainWindow):
         QMessageBox.information(self, "Success", "Faces captured and saved successfully!")
 
     def train_model(self):
-        known_face_encodings = []
-        known_face_names = []
-
-        # List all persons in the local storage
-        persons = [d for d in os.listdir(LOCAL_STORAGE_PATH) if os.path.isdir(os.path.join(LOCAL_STORAGE_PATH, d))]
-        total_images = sum([len([f for f in os.listdir(os.path.join(LOCAL_STORAGE_PATH, person)) if f.endswith((".jpg", ".png"))]) for person in persons])
-        progress_bar = tqdm(total=total_images, desc="Training Model", unit="image")
-
-        for person_name in persons:
-            person_dir = os.path.join(LOCAL_STORAGE_PATH, person_name)
-            for image_name in os.listdir(person_dir):
-                if image_name.endswith((".jpg", ".png")):
-                    image_path = os.path.join(person_dir, image_name)
-                    image = face_recognition.load_image_file(image_path)
-                    augmented_image = augment_image(image)
-                    face_encodings = face_recognition.face_encodings(augmented_image, num_jitters=10)
-
-                    for encoding in face_encodings:
-                        known_face_encodings.append(encoding)
-                        known_face_names.append(person_name)
-
-                    progress_bar.update(1)
-
-        progress_bar.close()
+        ensure_storage_dirs()
+        with timer("train"):
+            known_face_encodings, known_face_names = train_encodings()
 
         if not known_face_encodings:
             print("Error: No faces found for training.")
             return
 
         # Save model locally
-        with open(MODEL_PATH, "wb") as f:
-            pickle.dump((known_face_encodings, known_face_names), f)
+        save_model(known_face_encodings, known_face_names)
 
         print(f"Model trained and saved to {MODEL_PATH}!")
         print(f"Total faces encoded: {len(known_face_encodings)}")
@@ -402,13 +304,11 @@ class FaceCaptureApp(QMainWindow):
 
     def start_webcam_recognition(self):
         # Load face encodings
-        if not os.path.exists(MODEL_PATH):
+        model = load_model()
+        if model is None:
             QMessageBox.warning(self, "Error", "Model not found. Please train the model first.")
             return
 
-        with open(MODEL_PATH, "rb") as f:
-            known_face_encodings, known_face_names = pickle.load(f)
-
         cap = cv2.VideoCapture(0)
         if not cap.isOpened():
             QMessageBox.showerror(self, "Error", "Could not open webcam.")
@@ -416,46 +316,41 @@ class FaceCaptureApp(QMainWindow):
 
         show_popup = False
         recognized_name = None
+        tracker = FaceTracker()
 
         while True:
-            ret, frame = cap.read()
+            with timer("frame_grab"):
+                ret, frame = cap.read()
             if not ret:
+                inc("capture_failures")
                 QMessageBox.showerror(self, "Error", "Failed to capture image.")
                 break
 
-            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-            rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-
-            face_locations = face_recognition.face_locations(rgb_small_frame)
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+            results = recognize_frame(frame, model)
 
             recognized_name = None
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
-                name = "Unknown"
+            track_ids = tracker.update([location for location, _, _ in results])
+            for ((top, right, bottom, left), name, distance), track_id in zip(results, track_ids):
                 confidence = "Unknown"
 
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = known_face_names[first_match_index]
-                    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                    confidence = f"Confidence: {1 - face_distances[first_match_index]:.2f}"
+                if distance is not None:
+                    confidence = f"Confidence: {1 - distance:.2f}"
                     recognized_name = name
                     show_popup = True  # Enable popup when a person is recognized
 
-                top *= 4
-                right *= 4
-                bottom *= 4
-                left *= 4
+                # Only publish when a track appears or its identity changes, not every frame
+                if tracker.identity_changed(track_id, name):
+                    publish_recognition(track_id, name, distance, "webcam:0", (top, right, bottom, left))
 
                 cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
                 cv2.putText(frame, f"{name} ({confidence})", (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
 
-            # Show popup if a person is recognized
-            if show_popup and recognized_name:
-                frame = show_details_popup(frame, recognized_name)
+            with timer("render"):
+                # Show popup if a person is recognized
+                if show_popup and recognized_name:
+                    frame = show_details_popup(frame, recognized_name)
 
-            cv2.imshow("Face Recognition - Press Q to Quit", frame)
+                cv2.imshow("Face Recognition - Press Q to Quit", frame)
 
             # Handle key presses
             key = cv2.waitKey(1) & 0xFF
@@ -474,27 +369,19 @@ class FaceCaptureApp(QMainWindow):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp)")
         if file_name:
             # Load face encodings
-            if not os.path.exists(MODEL_PATH):
+            model = load_model()
+            if model is None:
                 QMessageBox.warning(self, "Error", "Model not found. Please train the model first.")
                 return
 
-            with open(MODEL_PATH, "rb") as f:
-                known_face_encodings, known_face_names = pickle.load(f)
-
-            image = face_recognition.load_image_file(file_name)
-            face_locations = face_recognition.face_locations(image)
-            face_encodings = face_recognition.face_encodings(image, face_locations)
+            image = load_image_file(file_name)
+            for track_id, result in enumerate(recognize_image(image, model), 1):
+                box = result["box"]
+                top, right, bottom, left = box["top"], box["right"], box["bottom"], box["left"]
+                name, distance = result["identity"], result["distance"]
+                confidence = "Unknown" if distance is None else f"Confidence: {1 - distance:.2f}"
 
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
-                name = "Unknown"
-                confidence = "Unknown"
-
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = known_face_names[first_match_index]
-                    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                    confidence = f"Confidence: {1 - face_distances[first_match_index]:.2f}"
+                publish_recognition(track_id, name, distance, f"upload:{os.path.basename(file_name)}", (top, right, bottom, left))
 
                 cv2.rectangle(image, (left, top), (right, bottom), (0, 255, 0), 2)
                 cv2.putText(image, f"{name} ({confidence})", (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
@@ -506,7 +393,7 @@ class FaceCaptureApp(QMainWindow):
 
     def list_trained_persons(self):
         """List all persons who have trained the model."""
-        persons = [d for d in os.listdir(LOCAL_STORAGE_PATH) if os.path.isdir(os.path.join(LOCAL_STORAGE_PATH, d))]
+        persons = list_persons()
         if not persons:
             QMessageBox.information(self, "Trained Persons", "No persons have been trained yet.")
             return
@@ -521,6 +408,9 @@ class FaceCaptureApp(QMainWindow):
     def closeEvent(self, event):
         if hasattr(self, 'capture_thread'):
             self.capture_thread.stop()
+        # Keep a JSON snapshot of this session's metrics next to the captured faces
+        dump_json(os.path.join(LOCAL_STORAGE_PATH, "metrics.json"))
+        dump_to_env_file()
         event.accept()
 
 def show_details_popup(frame, person_name):
@@ -540,19 +430,9 @@ def show_details_popup(frame, person_name):
     cv2.putText(frame, "Press 'C' to Close", (50, y + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
     return frame
 
-def load_person_details(person_name):
-    """Load person details from local storage."""
-    try:
-        details_path = os.path.join(LOCAL_STORAGE_PATH, person_name, "details.txt")
-        if os.path.exists(details_path):
-            with open(details_path, "r") as f:
-                return f.read()
-        return "No details found."
-    except Exception as e:
-        print(f"Error loading person details: {e}")
-        return "Error loading details."
-
 if __name__ == "__main__":
+    ensure_storage_dirs()
+    maybe_start_profiler()
     app = QApplication(sys.argv)
     window = FaceCaptureApp()
     window.show()
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+from metrics import inc
+
+# Constants
+EVENTS_URL = os.getenv("FIRELINX_EVENTS_URL", "http://localhost:5000/events")
+REPLAY_SIZE = 256
+CLIENT_BUFFER_SIZE = 64
+
+
+class EventBus:
+    """In-process fan-out of recognition and alert events to streaming clients.
+
+    Every published event gets a monotonically increasing id and is kept in a
+    ring buffer so that clients reconnecting with ``Last-Event-ID`` can replay
+    what they missed. Each subscriber has its own bounded buffer for live
+    events; a slow client drops its oldest events instead of blocking the
+    publisher. Whenever a client misses events, either because its buffer
+    overflowed or because they aged out of the ring, it receives a ``gap``
+    event first so it knows to reload its state.
+    """
+
+    def __init__(self, replay_size=REPLAY_SIZE, client_buffer_size=CLIENT_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._history = deque(maxlen=replay_size)
+        self._subscribers = set()
+        self._client_buffer_size = client_buffer_size
+
+    def publish(self, event_type, payload):
+        """Record an event and deliver it to every connected subscriber.
+
+        Ids are assigned and events delivered under one lock, so every
+        subscriber sees events in id order.
+        """
+        with self._lock:
+            event = {
+                "id": next(self._ids),
+                "type": event_type,
+                "timestamp": time.time(),
+                "data": payload,
+            }
+            self._history.append(event)
+            for subscriber in self._subscribers:
+                subscriber.put(event)
+        return event
+
+    def subscribe(self, last_event_id=None):
+        """Register a new subscriber that first replays events after ``last_event_id``.
+
+        The replay is taken straight from history rather than through the
+        bounded live buffer, so nothing still in the ring is lost. An id this
+        bus has not issued yet means the server restarted and ids began again
+        at 1; the client gets a ``gap`` with an unknown count followed by the
+        whole ring.
+        """
+        subscriber = Subscriber(self._client_buffer_size)
+        with self._lock:
+            if last_event_id is not None:
+                if last_event_id >= next_id_after(self._history):
+                    subscriber.replay.append(gap_event(None))
+                    last_event_id = 0
+                replay = [event for event in self._history if event["id"] > last_event_id]
+                oldest = replay[0]["id"] if replay else next_id_after(self._history)
+                if oldest > last_event_id + 1 and not subscriber.replay:
+                    subscriber.replay.append(gap_event(oldest - last_event_id - 1))
+                subscriber.replay.extend(replay)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        subscriber.close()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class Subscriber:
+    """Per-client replay backlog plus a bounded buffer of live events."""
+
+    def __init__(self, maxlen):
+        self.replay = deque()
+        self._events = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._pending_drops = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, event):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+                self._pending_drops += 1
+                inc("events_dropped")
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next event, or None if nothing arrived within ``timeout``."""
+        with self._cond:
+            if self.replay:
+                return self.replay.popleft()
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            if self._pending_drops:
+                # The dropped events were the oldest buffered, so the gap comes first
+                missed, self._pending_drops = self._pending_drops, 0
+                return gap_event(missed)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+def next_id_after(history):
+    """Id the next published event will get, given the current ring buffer."""
+    return history[-1]["id"] + 1 if history else 1
+
+def gap_event(missed):
+    """Event telling a client that ``missed`` events will never reach it.
+
+    ``missed`` is None when the count is unknown, after a server restart.
+    """
+    return {"id": None, "type": "gap", "timestamp": time.time(), "data": {"missed": missed}}
+
+def format_sse(event):
+    """Serialize an event as a Server-Sent Events frame.
+
+    Events without an id (``gap``) omit the ``id:`` field so they do not
+    move the client's ``Last-Event-ID``.
+    """
+    frame = f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+    if event["id"] is None:
+        return frame
+    return f"id: {event['id']}\n" + frame
+
+
+def publish_event(event_type, payload, url=EVENTS_URL):
+    """Post an event to the server's event channel without blocking the caller.
+
+    Used by processes other than the server (the desktop app and ``sos.py``)
+    so their results reach dashboard clients. Delivery is best effort: if the
+    server is not running the event is silently dropped. Short-lived scripts
+    should ``join`` the returned thread before exiting.
+    """
+    def _post():
+        try:
+            import requests
+            requests.post(url, json={"type": event_type, "data": payload}, timeout=2)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=_post, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,444 @@
+"""Headless face capture, training and recognition logic.
+
+Nothing here imports a GUI toolkit, and the heavy dependencies (OpenCV,
+NumPy, face_recognition/dlib, PIL, tqdm) are imported on first use inside
+the functions that need them, so importing this module is cheap and has
+no side effects on disk.
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+from dataclasses import dataclass
+from typing import Optional
+from metrics import dump_to_env_file, inc, maybe_start_profiler, timer
+
+# Constants
+MODEL_PATH = "models/face_encodings.pkl"
+LOCAL_STORAGE_PATH = "local_storage"
+MATCH_TOLERANCE = 0.6
+# Live recognition downscales frames by this factor before detection
+RESIZE_FACTOR = 0.25
+# Face capture runs detection on every Nth frame
+FACE_DETECTION_INTERVAL = 5
+
+def ensure_storage_dirs():
+    """Create the model and local storage directories if they are missing."""
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    os.makedirs(LOCAL_STORAGE_PATH, exist_ok=True)
+
+def save_image_locally(image, destination_path):
+    """Saves an image to the local storage."""
+    import cv2
+    import numpy as np
+
+    try:
+        if image is None or not isinstance(image, np.ndarray):
+            print("Error: Invalid image provided for save.")
+            return
+
+        _, img_encoded = cv2.imencode(".jpg", image)
+        if img_encoded is None:
+            print("Error: Failed to encode image.")
+            return
+
+        with open(destination_path, "wb") as f:
+            f.write(img_encoded.tobytes())
+        print(f"Image saved to {destination_path}.")
+    except Exception as e:
+        print(f"Error saving image: {e}")
+
+def load_image_locally(image_path):
+    """Loads an image from the local storage."""
+    import cv2
+    import numpy as np
+
+    try:
+        with open(image_path, "rb") as f:
+            img_bytes = f.read()
+        img_array = np.frombuffer(img_bytes, dtype=np.uint8)
+        image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        return image
+    except Exception as e:
+        print(f"Error loading image: {e}")
+        return None
+
+def load_image_file(image_path):
+    """Load an image file as an RGB array, as expected by the face functions."""
+    import face_recognition
+
+    return face_recognition.load_image_file(image_path)
+
+def adjust_brightness(image, target_brightness=128):
+    """Adjust image brightness to a target level."""
+    import cv2
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    current_brightness = gray.mean()
+    ratio = target_brightness / current_brightness
+    adjusted_image = cv2.convertScaleAbs(image, alpha=ratio, beta=0)
+    return adjusted_image
+
+def align_face(image, face_location):
+    """Align face using facial landmarks."""
+    import face_recognition
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    top, right, bottom, left = face_location
+    face_image = image[top:bottom, left:right]
+    landmarks = face_recognition.face_landmarks(face_image)
+    if not landmarks:
+        return face_image
+    landmarks = landmarks[0]
+    nose_bridge = landmarks["nose_bridge"]
+    dx = nose_bridge[-1][0] - nose_bridge[0][0]
+    dy = nose_bridge[-1][1] - nose_bridge[0][1]
+    angle = np.degrees(np.arctan2(dy, dx))
+    aligned_image = Image.fromarray(face_image)
+    aligned_image = ImageOps.exif_transpose(aligned_image.rotate(-angle))
+    return np.array(aligned_image)
+
+@dataclass
+class AugmentationConfig:
+    """How many augmented variants to encode per source image, and how.
+
+    ``n_variants`` and ``num_jitters`` trade against each other: dlib re-samples
+    each variant ``num_jitters`` times, so the encoding cost per source image
+    grows with ``n_variants * num_jitters``. The defaults match the original
+    training setup of one augmented image jittered 10 times, with the same
+    flip, rotation, noise, brightness/contrast and CLAHE probabilities as the
+    old albumentations pipeline (its blur, limited to a 0-1 px kernel, did
+    nothing and is not reproduced).
+    """
+    n_variants: int = 1
+    num_jitters: int = 10
+    seed: Optional[int] = None
+    flip_p: float = 0.5
+    rotate_p: float = 0.5
+    rotate_limit: float = 20.0
+    noise_p: float = 0.5
+    noise_var_limit: tuple = (10.0, 50.0)
+    brightness_contrast_p: float = 0.5
+    brightness_limit: float = 0.2
+    contrast_limit: float = 0.2
+    clahe_p: float = 0.5
+    clahe_clip_limit: tuple = (1.0, 4.0)
+    clahe_tile_grid: tuple = (8, 8)
+
+def augment_batch(image, config, rng):
+    """Produce ``config.n_variants`` augmented copies of an RGB image in one pass.
+
+    The copies are stacked into an (N, H, W, C) array and flips, Gaussian
+    noise, brightness and contrast are applied to the whole stack at once with
+    per-variant parameters drawn from ``rng`` (a ``numpy.random.Generator``).
+    Rotation and CLAHE are applied per variant since OpenCV has no batched
+    form of either. All parameters are drawn up front, so the same seed gives
+    the same variants whichever steps end up applied.
+    """
+    import numpy as np
+
+    n = config.n_variants
+    h, w = image.shape[:2]
+
+    flip = rng.random(n) < config.flip_p
+    angles = rng.uniform(-config.rotate_limit, config.rotate_limit, n)
+    angles[rng.random(n) >= config.rotate_p] = 0.0
+    low, high = config.noise_var_limit
+    std = np.sqrt(rng.uniform(low, high, n)) * (rng.random(n) < config.noise_p)
+    apply = rng.random(n) < config.brightness_contrast_p
+    alpha = np.where(apply, 1.0 + rng.uniform(-config.contrast_limit, config.contrast_limit, n), 1.0)
+    beta = np.where(apply, rng.uniform(-config.brightness_limit, config.brightness_limit, n) * 255.0, 0.0)
+    clip_limits = rng.uniform(*config.clahe_clip_limit, n)
+    clahe = rng.random(n) < config.clahe_p
+
+    batch = np.repeat(image[np.newaxis].astype(np.float32), n, axis=0)
+    batch[flip] = batch[flip, :, ::-1]
+
+    if angles.any() or clahe.any():
+        import cv2
+
+    for i in np.flatnonzero(angles):
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angles[i], 1.0)
+        batch[i] = cv2.warpAffine(batch[i], matrix, (w, h), borderMode=cv2.BORDER_REFLECT_101)
+
+    batch += rng.standard_normal(batch.shape, dtype=np.float32) * std.astype(np.float32)[:, None, None, None]
+    batch *= alpha.astype(np.float32)[:, None, None, None]
+    batch += beta.astype(np.float32)[:, None, None, None]
+    batch = np.clip(batch, 0, 255).astype(np.uint8)
+
+    # CLAHE equalizes the lightness channel only, as albumentations does for colour images
+    for i in np.flatnonzero(clahe):
+        lab = cv2.cvtColor(batch[i], cv2.COLOR_RGB2LAB)
+        equalizer = cv2.createCLAHE(clipLimit=clip_limits[i], tileGridSize=config.clahe_tile_grid)
+        lab[:, :, 0] = equalizer.apply(lab[:, :, 0])
+        batch[i] = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+
+    return batch
+
+def detect_faces(image):
+    """Return (top, right, bottom, left) locations of faces in an RGB image."""
+    import face_recognition
+
+    with timer("detect"):
+        return face_recognition.face_locations(image)
+
+def encode_faces(image, face_locations=None, num_jitters=1):
+    """Return a 128-d encoding for each face in ``image``."""
+    import face_recognition
+
+    with timer("encode"):
+        return face_recognition.face_encodings(image, face_locations, num_jitters=num_jitters)
+
+def match_face(known_face_encodings, known_face_names, face_encoding, tolerance=MATCH_TOLERANCE):
+    """Return (name, distance) of the first known face within ``tolerance``.
+
+    Returns ("Unknown", None) when nothing matches.
+    """
+    import face_recognition
+    import numpy as np
+
+    with timer("match"):
+        if len(known_face_encodings) == 0:
+            matches = []
+        else:
+            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+            matches = np.flatnonzero(face_distances <= tolerance)
+    if len(matches) == 0:
+        inc("faces_unknown")
+        return "Unknown", None
+    inc("faces_matched")
+    return known_face_names[matches[0]], face_distances[matches[0]]
+
+def list_persons(storage_path=LOCAL_STORAGE_PATH):
+    """Names of all persons with a directory in local storage."""
+    if not os.path.isdir(storage_path):
+        return []
+    return [d for d in os.listdir(storage_path) if os.path.isdir(os.path.join(storage_path, d))]
+
+def load_person_details(person_name):
+    """Load person details from local storage."""
+    try:
+        details_path = os.path.join(LOCAL_STORAGE_PATH, person_name, "details.txt")
+        if os.path.exists(details_path):
+            with open(details_path, "r") as f:
+                return f.read()
+        return "No details found."
+    except Exception as e:
+        print(f"Error loading person details: {e}")
+        return "Error loading details."
+
+def load_model(model_path=MODEL_PATH):
+    """Return (known_face_encodings, known_face_names), or None if no model is saved."""
+    if not os.path.exists(model_path):
+        return None
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+def save_model(known_face_encodings, known_face_names, model_path=MODEL_PATH):
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    with open(model_path, "wb") as f:
+        pickle.dump((known_face_encodings, known_face_names), f)
+
+def list_training_images(storage_path=LOCAL_STORAGE_PATH):
+    """Return sorted (person_name, image_path) pairs for every stored face image."""
+    images = []
+    for person_name in sorted(list_persons(storage_path)):
+        person_dir = os.path.join(storage_path, person_name)
+        for image_name in sorted(os.listdir(person_dir)):
+            if image_name.endswith((".jpg", ".png")):
+                images.append((person_name, os.path.join(person_dir, image_name)))
+    return images
+
+def train_encodings(storage_path=LOCAL_STORAGE_PATH, config=None, images=None):
+    """Encode every stored face image; returns (known_face_encodings, known_face_names).
+
+    ``images`` overrides the (person_name, image_path) pairs found in
+    ``storage_path``. Images are visited in sorted order so a seeded
+    ``config`` produces the same model on every run.
+    """
+    import numpy as np
+    from tqdm import tqdm
+
+    config = config or AugmentationConfig()
+    rng = np.random.default_rng(config.seed)
+    known_face_encodings = []
+    known_face_names = []
+
+    if images is None:
+        images = list_training_images(storage_path)
+    progress_bar = tqdm(total=len(images), desc="Training Model", unit="image")
+
+    for person_name, image_path in images:
+        image = load_image_file(image_path)
+        with timer("augment"):
+            variants = augment_batch(image, config, rng)
+        for variant in variants:
+            for encoding in encode_faces(variant, num_jitters=config.num_jitters):
+                known_face_encodings.append(encoding)
+                known_face_names.append(person_name)
+
+        progress_bar.update(1)
+
+    progress_bar.close()
+    return known_face_encodings, known_face_names
+
+def recognize_frame(frame, model, resize_factor=RESIZE_FACTOR, tolerance=MATCH_TOLERANCE):
+    """Recognize faces in a BGR camera frame.
+
+    Detection and encoding run on a copy downscaled by ``resize_factor``.
+    Returns a list of ((top, right, bottom, left), name, distance) with
+    locations in full-frame coordinates.
+    """
+    import cv2
+
+    known_face_encodings, known_face_names = model
+    with timer("resize"):
+        small_frame = cv2.resize(frame, (0, 0), fx=resize_factor, fy=resize_factor)
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+    face_locations = detect_faces(rgb_small_frame)
+    face_encodings = encode_faces(rgb_small_frame, face_locations)
+
+    results = []
+    for location, face_encoding in zip(face_locations, face_encodings):
+        name, distance = match_face(known_face_encodings, known_face_names, face_encoding, tolerance)
+        results.append((tuple(int(v / resize_factor) for v in location), name, distance))
+    return results
+
+def recognize_image(image, model, tolerance=MATCH_TOLERANCE):
+    """Match every face in an RGB image; returns a list of result dicts."""
+    known_face_encodings, known_face_names = model
+    face_locations = detect_faces(image)
+    face_encodings = encode_faces(image, face_locations)
+
+    results = []
+    for location, face_encoding in zip(face_locations, face_encodings):
+        name, distance = match_face(known_face_encodings, known_face_names, face_encoding, tolerance)
+        results.append(result_dict(location, name, distance))
+    return results
+
+def result_dict(location, name, distance):
+    """JSON-friendly form of one recognition result."""
+    top, right, bottom, left = location
+    return {
+        "identity": name,
+        "distance": None if distance is None else round(float(distance), 4),
+        "box": {"top": int(top), "right": int(right), "bottom": int(bottom), "left": int(left)},
+    }
+
+def capture_frame(camera_index=0):
+    """Grab a single BGR frame from a camera, or None if it cannot be read."""
+    import cv2
+
+    cap = cv2.VideoCapture(camera_index)
+    try:
+        with timer("frame_grab"):
+            ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret:
+        inc("capture_failures")
+        return None
+    return frame
+
+class FaceTracker:
+    """Assigns stable track IDs to faces across frames by nearest-centroid matching."""
+
+    def __init__(self, max_distance=80, max_missed=10):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.tracks = {}  # track_id -> {"centroid", "missed", "name"}
+
+    def update(self, face_locations):
+        """Return a track ID for each (top, right, bottom, left) location, in order."""
+        assigned = []
+        unmatched = set(self.tracks)
+        for top, right, bottom, left in face_locations:
+            centroid = ((left + right) / 2, (top + bottom) / 2)
+            best_id, best_distance = None, self.max_distance
+            for track_id in unmatched:
+                tx, ty = self.tracks[track_id]["centroid"]
+                distance = ((tx - centroid[0]) ** 2 + (ty - centroid[1]) ** 2) ** 0.5
+                if distance < best_distance:
+                    best_id, best_distance = track_id, distance
+            if best_id is None:
+                best_id = self.next_id
+                self.next_id += 1
+                self.tracks[best_id] = {"centroid": centroid, "missed": 0, "name": None}
+            else:
+                unmatched.discard(best_id)
+                self.tracks[best_id]["centroid"] = centroid
+                self.tracks[best_id]["missed"] = 0
+            assigned.append(best_id)
+
+        for track_id in unmatched:
+            self.tracks[track_id]["missed"] += 1
+            if self.tracks[track_id]["missed"] > self.max_missed:
+                del self.tracks[track_id]
+        return assigned
+
+    def identity_changed(self, track_id, name):
+        """Record ``name`` for a track; True if it is new or differs from before."""
+        changed = self.tracks[track_id]["name"] != name
+        self.tracks[track_id]["name"] = name
+        return changed
+
+def publish_recognition(track_id, name, distance, camera, location):
+    from events import publish_event
+
+    top, right, bottom, left = location
+    publish_event("recognition", {
+        "track_id": track_id,
+        "identity": name,
+        "distance": None if distance is None else round(float(distance), 4),
+        "camera": camera,
+        "box": {"top": int(top), "right": int(right), "bottom": int(bottom), "left": int(left)},
+    })
+
+def main(argv=None):
+    maybe_start_profiler()
+    parser = argparse.ArgumentParser(description="Headless FIRELINX face recognition")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--list", action="store_true", help="list persons in local storage")
+    group.add_argument("--train", action="store_true", help="train and save the model")
+    group.add_argument("--recognize", metavar="IMAGE", help="recognize faces in an image file")
+    group.add_argument("--camera", metavar="INDEX", type=int, help="recognize faces in one frame from a camera")
+    parser.add_argument("--variants", type=int, default=1, help="augmented variants per training image")
+    parser.add_argument("--jitters", type=int, default=10, help="dlib num_jitters per variant")
+    parser.add_argument("--seed", type=int, help="seed for reproducible augmentation")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print(json.dumps(list_persons()))
+    elif args.train:
+        ensure_storage_dirs()
+        config = AugmentationConfig(n_variants=args.variants, num_jitters=args.jitters, seed=args.seed)
+        known_face_encodings, known_face_names = train_encodings(config=config)
+        if not known_face_encodings:
+            print("Error: No faces found for training.", file=sys.stderr)
+            return 1
+        save_model(known_face_encodings, known_face_names)
+        print(f"Model trained and saved to {MODEL_PATH}!")
+        print(f"Total faces encoded: {len(known_face_encodings)}")
+    else:
+        model = load_model()
+        if model is None:
+            print("Error: Model not found. Please train the model first.", file=sys.stderr)
+            return 1
+        if args.recognize:
+            results = recognize_image(load_image_file(args.recognize), model)
+        else:
+            frame = capture_frame(args.camera)
+            if frame is None:
+                print(f"Error: Could not read from camera {args.camera}.", file=sys.stderr)
+                return 1
+            results = [result_dict(*result) for result in recognize_frame(frame, model)]
+        print(json.dumps(results))
+    dump_to_env_file()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
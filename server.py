@@ -1,8 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+import json
+import os
 import subprocess
+import tempfile
+from events import EventBus, format_sse
+import metrics
 
 app = Flask(__name__)
+event_bus = EventBus()
+
+# Seconds between keep-alive comments on idle event streams
+SSE_HEARTBEAT_INTERVAL = 15
 
 # Configure CORS with explicit settings
 CORS(app, resources={
@@ -15,9 +24,33 @@ CORS(app, resources={
     r"/recognize": {
         "origins": ["http://localhost:5173"],
         "supports_credentials": True
+    },
+    r"/events/stream": {
+        "origins": ["http://localhost:5173"],
+        "methods": ["GET"],
+        "supports_credentials": True
     }
 })
 
+def run_script(args, stage):
+    """Run a script like subprocess.run(check=True), merging the metrics it dumps on exit."""
+    fd, metrics_path = tempfile.mkstemp(prefix="firelinx-metrics-", suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, **{metrics.METRICS_FILE_ENV: metrics_path})
+    # The profile file belongs to the server; a child writing it at exit would be overwritten
+    env.pop(metrics.PROFILE_FILE_ENV, None)
+    try:
+        with metrics.timer(stage):
+            return subprocess.run(args, check=True, capture_output=True, text=True, env=env)
+    finally:
+        if os.path.getsize(metrics_path):
+            metrics.merge_file(metrics_path)
+        os.remove(metrics_path)
+
+def publish(event_type, payload):
+    metrics.inc("events_published")
+    return event_bus.publish(event_type, payload)
+
 @app.route('/trigger-sos', methods=['POST', 'OPTIONS'])
 def trigger_sos():
     if request.method == 'OPTIONS':
@@ -29,11 +62,9 @@ def trigger_sos():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
     
+    publish("sos", {"status": "triggered"})
     try:
-        result = subprocess.run(['python', 'sos.py'], 
-                              check=True, 
-                              capture_output=True, 
-                              text=True)
+        result = run_script(['python', 'sos.py'], "sos_request")
         response = jsonify({
             "status": "success", 
             "message": "SOS triggered successfully",
@@ -43,6 +74,7 @@ def trigger_sos():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
     except subprocess.CalledProcessError as e:
+        publish("sos", {"status": "error", "message": "Failed to trigger SOS"})
         response = jsonify({
             "status": "error", 
             "message": "Failed to trigger SOS",
@@ -60,27 +92,91 @@ def trigger_recognize():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
     
+    # Recognize an uploaded image if one was sent, otherwise one frame from the server's camera
+    upload = request.files.get('image')
+    image_path = None
+    if upload:
+        fd, image_path = tempfile.mkstemp(prefix="firelinx-recognize-", suffix=os.path.splitext(upload.filename)[1])
+        os.close(fd)
+        upload.save(image_path)
+    args = ['python', 'face_core.py'] + (['--recognize', image_path] if image_path else ['--camera', '0'])
+
     try:
-        result = subprocess.run(['python', 'capture_faces.py', '--recognize'], 
-                              check=True, 
-                              capture_output=True, 
-                              text=True)
+        result = run_script(args, "recognize_request")
+        results = json.loads(result.stdout)
+        camera = "upload" if image_path else "server:0"
+        for face in results:
+            publish("recognition", {**face, "camera": camera})
         response = jsonify({
             "status": "success", 
             "message": "Face recognition completed",
-            "data": result.stdout
+            "data": results
         })
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:5173')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, ValueError) as e:
+        # ValueError: face_core.py printed something other than its JSON results
+        message = str(e.stderr) if isinstance(e, subprocess.CalledProcessError) else f"Invalid recognition output: {e}"
         response = jsonify({
             "status": "error", 
-            "message": str(e.stderr)
+            "message": message
         })
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:5173')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 500
+    finally:
+        if image_path:
+            os.remove(image_path)
+
+@app.route('/events', methods=['POST'])
+def ingest_event():
+    # Only local processes (desktop app, sos.py) may publish events
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+
+    body = request.get_json(silent=True) or {}
+    event_type = body.get("type")
+    if event_type not in ("recognition", "sos"):
+        return jsonify({"status": "error", "message": "Unknown event type"}), 400
+
+    event = publish(event_type, body.get("data", {}))
+    return jsonify({"status": "success", "id": event["id"]}), 200
+
+@app.route('/events/stream', methods=['GET'])
+def stream_events():
+    # EventSource sends Last-Event-ID on reconnect; allow a query param for manual clients
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+
+    subscriber = event_bus.subscribe(last_event_id)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscriber.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def export_metrics():
+    return Response(metrics.REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    # The debug reloader's parent only watches files; the child it spawns serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        metrics.maybe_start_profiler()
+    app.run(debug=True, port=5000, threaded=True)
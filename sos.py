@@ -1,25 +1,31 @@
-from twilio.rest import Client
-import requests
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from dotenv import load_dotenv
+from contextlib import ExitStack
+from functools import lru_cache
 import os
-
-# Load environment variables from .env
-load_dotenv()  
-
-# Twilio credentials
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
-RECIPIENT_PHONE_NUMBER = os.getenv("RECIPIENT_PHONE_NUMBER")
-
-# Email credentials
-EMAIL_SENDER = os.getenv("EMAIL_SENDER")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-EMAIL_RECIPIENTS = os.getenv("EMAIL_RECIPIENTS").split(",")  # Split if multiple emails
+from events import publish_event
+from metrics import dump_to_env_file, maybe_start_profiler, timer
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Load credentials from .env on first use rather than at import time."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return {
+        # Twilio credentials
+        "TWILIO_ACCOUNT_SID": os.getenv("TWILIO_ACCOUNT_SID"),
+        "TWILIO_AUTH_TOKEN": os.getenv("TWILIO_AUTH_TOKEN"),
+        "TWILIO_PHONE_NUMBER": os.getenv("TWILIO_PHONE_NUMBER"),
+        "RECIPIENT_PHONE_NUMBER": os.getenv("RECIPIENT_PHONE_NUMBER"),
+        # Email credentials
+        "EMAIL_SENDER": os.getenv("EMAIL_SENDER"),
+        "EMAIL_PASSWORD": os.getenv("EMAIL_PASSWORD"),
+        # Split if multiple emails
+        "EMAIL_RECIPIENTS": [e.strip() for e in os.getenv("EMAIL_RECIPIENTS", "").split(",") if e.strip()],
+    }
 
 # Function to get current timestamp
 def get_current_timestamp():
@@ -35,7 +41,10 @@ Fire Cause: Electricity
 
 def get_gps_coordinates():
     try:
-        response = requests.get('https://ipinfo.io')
+        import requests
+
+        with timer("geolocation"):
+            response = requests.get('https://ipinfo.io')
         if response.status_code == 200:
             data = response.json()
             location = data.get('loc', '').split(',')
@@ -64,12 +73,16 @@ def send_sms(latitude=None, longitude=None, manual_location=None):
         else:
             full_message = f"{base_message}Fire location: Location not available"
 
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        message = client.messages.create(
-            body=full_message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=RECIPIENT_PHONE_NUMBER
-        )
+        from twilio.rest import Client
+
+        config = get_config()
+        client = Client(config["TWILIO_ACCOUNT_SID"], config["TWILIO_AUTH_TOKEN"])
+        with timer("twilio_call"):
+            message = client.messages.create(
+                body=full_message,
+                from_=config["TWILIO_PHONE_NUMBER"],
+                to=config["RECIPIENT_PHONE_NUMBER"]
+            )
         print(f"SMS sent: {message.sid}")
         return {"status": "success", "message": "SMS alert sent successfully!"}
     except Exception as e:
@@ -78,6 +91,11 @@ def send_sms(latitude=None, longitude=None, manual_location=None):
 
 def send_email(latitude=None, longitude=None, manual_location=None):
     try:
+        config = get_config()
+        recipients = config["EMAIL_RECIPIENTS"]
+        if not recipients:
+            raise ValueError("EMAIL_RECIPIENTS is not configured")
+
         subject = f"FIRE Alert - {get_current_timestamp()}"
         base_message = generate_sos_message()
         
@@ -91,28 +109,41 @@ def send_email(latitude=None, longitude=None, manual_location=None):
             body = f"{base_message}Fire location: Location not available"
 
         msg = MIMEMultipart()
-        msg['From'] = EMAIL_SENDER
-        msg['To'] = ", ".join(EMAIL_RECIPIENTS)  # Show all recipients in To field
+        msg['From'] = config["EMAIL_SENDER"]
+        msg['To'] = ", ".join(recipients)  # Show all recipients in To field
         msg['Subject'] = subject
         msg.attach(MIMEText(body, 'plain'))
 
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_SENDER, EMAIL_RECIPIENTS, msg.as_string())
+        with ExitStack() as stack:
+            with timer("smtp_connect"):
+                server = stack.enter_context(smtplib.SMTP('smtp.gmail.com', 587))
+                server.starttls()
+                server.login(config["EMAIL_SENDER"], config["EMAIL_PASSWORD"])
+            with timer("smtp_send"):
+                server.sendmail(config["EMAIL_SENDER"], recipients, msg.as_string())
 
-        print(f"Email sent successfully to {len(EMAIL_RECIPIENTS)} recipients!")
-        return {"status": "success", "message": f"Email alert sent to {len(EMAIL_RECIPIENTS)} recipients"}
+        print(f"Email sent successfully to {len(recipients)} recipients!")
+        return {"status": "success", "message": f"Email alert sent to {len(recipients)} recipients"}
     except Exception as e:
         print(f"Failed to send email: {e}")
         return {"status": "error", "message": f"Failed to send email alerts: {str(e)}"}
 
+def publish_delivery_status(sms_result, email_result, location):
+    """Report SOS delivery status on the server's event stream."""
+    threads = [
+        publish_event("sos", {"channel": "sms", "location": location, **sms_result}),
+        publish_event("sos", {"channel": "email", "location": location, **email_result}),
+    ]
+    for thread in threads:
+        thread.join(timeout=3)
+
 def sos_button_click():
     latitude, longitude = get_gps_coordinates()
 
     if latitude and longitude:
         sms_result = send_sms(latitude, longitude)
         email_result = send_email(latitude, longitude)
+        publish_delivery_status(sms_result, email_result, {"latitude": latitude, "longitude": longitude})
         return sms_result, email_result
     else:
         manual_location = input("Unable to fetch location. Enter location manually: ")
@@ -122,7 +153,10 @@ def sos_button_click():
         else:
             sms_result = send_sms()
             email_result = send_email()
+        publish_delivery_status(sms_result, email_result, {"manual": manual_location or None})
         return sms_result, email_result
 
 if __name__ == "__main__":
+    maybe_start_profiler()
     sos_button_click()
+    dump_to_env_file()
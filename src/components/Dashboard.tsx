@@ -1,7 +1,17 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { Thermometer, Gauge, Droplet, Clock, MapPin, Settings } from 'lucide-react';
+import { subscribeToEvents } from '../utils/events';
+import type { ServerEvent } from '../types';
+
+const MAX_ALERTS = 20;
 
 const Dashboard: React.FC = () => {
+  const [alerts, setAlerts] = useState<ServerEvent[]>([]);
+
+  useEffect(() => subscribeToEvents((event) => {
+    setAlerts((previous) => [event, ...previous].slice(0, MAX_ALERTS));
+  }), []);
+
   return (
     <div className="space-y-6">
       <div className="grid grid-cols-1 md:grid-cols-4 gap-4">
@@ -37,11 +47,19 @@ const Dashboard: React.FC = () => {
             <h2 className="text-xl font-semibold">Alert Messages</h2>
             <span className="px-3 py-1 bg-red-500/20 text-red-500 rounded-full text-sm">Emergency Alert</span>
           </div>
-          <div className="bg-red-500/10 border border-red-500/20 rounded-lg p-4">
-            <p className="text-sm text-gray-300">
-              SOS Messages sent by common people will appear here with real-time updates
-            </p>
-          </div>
+          {alerts.length === 0 ? (
+            <div className="bg-red-500/10 border border-red-500/20 rounded-lg p-4">
+              <p className="text-sm text-gray-300">
+                SOS Messages sent by common people will appear here with real-time updates
+              </p>
+            </div>
+          ) : (
+            <div className="space-y-2 max-h-64 overflow-y-auto">
+              {alerts.map((alert, index) => (
+                <AlertEntry key={alert.id ?? `gap-${index}`} alert={alert} />
+              ))}
+            </div>
+          )}
         </div>
 
         <div className="bg-[#1A1F2E] rounded-xl p-6">
@@ -76,6 +94,30 @@ const MetricCard: React.FC<{
   </div>
 );
 
+const describeAlert = (alert: ServerEvent) => {
+  switch (alert.type) {
+    case 'recognition':
+      return `Recognized ${alert.data.identity} (${alert.data.camera})`;
+    case 'sos':
+      return `SOS ${alert.data.channel ? `${alert.data.channel} ` : ''}${alert.data.status}` +
+        (alert.data.message ? `: ${alert.data.message}` : '');
+    case 'gap':
+      return alert.data.missed === null
+        ? 'Server restarted; earlier updates may be missing'
+        : `${alert.data.missed} updates were missed`;
+  }
+};
+
+const AlertEntry: React.FC<{ alert: ServerEvent }> = ({ alert }) => (
+  <div className={`rounded-lg p-3 text-sm border ${
+    alert.type === 'sos' ? 'bg-red-500/10 border-red-500/20 text-red-300' :
+    alert.type === 'gap' ? 'bg-yellow-500/10 border-yellow-500/20 text-yellow-300' :
+    'bg-blue-500/10 border-blue-500/20 text-gray-300'
+  }`}>
+    {describeAlert(alert)}
+  </div>
+);
+
 const LogEntry: React.FC<{
   zone: string;
   type: string;
@@ -190,10 +190,10 @@ const FireReportForm: React.FC = () => {
       
       if (data.status === 'success') {
         toast.success(data.message);
+        const match = data.data.find((result: { identity: string }) => result.identity !== 'Unknown');
         setFormData(prev => ({
           ...prev,
-          user: data.data.name || '',
-          userID: data.data.id || ''
+          user: match ? match.identity : ''
         }));
       } else {
         throw new Error(data.message || 'Unknown error');
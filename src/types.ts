@@ -14,4 +14,24 @@ export interface FireReport {
 export interface Coordinates {
   lat: number;
   lng: number;
-}
\ No newline at end of file
+}
+
+export interface RecognitionEventData {
+  identity: string;
+  distance: number | null;
+  camera: string;
+  track_id?: number;
+  box: { top: number; right: number; bottom: number; left: number };
+}
+
+export interface SosEventData {
+  status: string;
+  message?: string;
+  channel?: 'sms' | 'email';
+  location?: { latitude?: number | null; longitude?: number | null; manual?: string | null };
+}
+
+export type ServerEvent =
+  | { id: number; type: 'recognition'; data: RecognitionEventData }
+  | { id: number; type: 'sos'; data: SosEventData }
+  | { id: null; type: 'gap'; data: { missed: number | null } };
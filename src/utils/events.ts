@@ -0,0 +1,28 @@
+import type { ServerEvent } from '../types';
+
+// Server-Sent Events stream from server.py
+const EVENTS_STREAM_URL = 'http://localhost:5000/events/stream';
+const EVENT_TYPES: ServerEvent['type'][] = ['recognition', 'sos', 'gap'];
+
+// EventSource reconnects on its own and sends Last-Event-ID, so the server
+// replays anything missed; a 'gap' event means some updates are gone for good.
+export const subscribeToEvents = (onEvent: (event: ServerEvent) => void) => {
+  const source = new EventSource(EVENTS_STREAM_URL);
+
+  EVENT_TYPES.forEach((type) => {
+    source.addEventListener(type, (message) => {
+      const { data, lastEventId } = message as MessageEvent<string>;
+      onEvent({
+        id: type === 'gap' ? null : Number(lastEventId),
+        type,
+        data: JSON.parse(data)
+      } as ServerEvent);
+    });
+  });
+
+  source.onerror = () => {
+    console.error('Event stream disconnected, retrying...');
+  };
+
+  return () => source.close();
+};
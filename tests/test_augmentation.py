@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from face_core import AugmentationConfig, augment_batch
+
+# Rotation and CLAHE need OpenCV; everything else is pure NumPy
+NUMPY_ONLY = {"rotate_p": 0.0, "clahe_p": 0.0}
+
+
+def sample_image(height=32, width=48):
+    rng = np.random.default_rng(123)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def test_batch_has_one_uint8_image_per_variant():
+    config = AugmentationConfig(n_variants=6, **NUMPY_ONLY)
+    batch = augment_batch(sample_image(), config, np.random.default_rng(0))
+    assert batch.shape == (6, 32, 48, 3)
+    assert batch.dtype == np.uint8
+
+
+def test_same_seed_gives_identical_variants():
+    config = AugmentationConfig(n_variants=4, **NUMPY_ONLY)
+    first = augment_batch(sample_image(), config, np.random.default_rng(7))
+    second = augment_batch(sample_image(), config, np.random.default_rng(7))
+    assert np.array_equal(first, second)
+
+
+def test_different_seeds_give_different_variants():
+    config = AugmentationConfig(n_variants=4, **NUMPY_ONLY)
+    first = augment_batch(sample_image(), config, np.random.default_rng(1))
+    second = augment_batch(sample_image(), config, np.random.default_rng(2))
+    assert not np.array_equal(first, second)
+
+
+def test_disabled_augmentations_return_the_source_image():
+    config = AugmentationConfig(n_variants=3, flip_p=0.0, noise_p=0.0, brightness_contrast_p=0.0, **NUMPY_ONLY)
+    image = sample_image()
+    batch = augment_batch(image, config, np.random.default_rng(0))
+    for variant in batch:
+        assert np.array_equal(variant, image)
+
+
+def test_flip_mirrors_the_image_horizontally():
+    config = AugmentationConfig(n_variants=2, flip_p=1.0, noise_p=0.0, brightness_contrast_p=0.0, **NUMPY_ONLY)
+    image = sample_image()
+    batch = augment_batch(image, config, np.random.default_rng(0))
+    assert np.array_equal(batch[0], image[:, ::-1])
+
+
+def test_rotation_and_clahe_keep_shape_and_determinism():
+    pytest.importorskip("cv2")
+    config = AugmentationConfig(n_variants=5, rotate_p=1.0, clahe_p=1.0)
+    first = augment_batch(sample_image(), config, np.random.default_rng(3))
+    second = augment_batch(sample_image(), config, np.random.default_rng(3))
+    assert first.shape == (5, 32, 48, 3)
+    assert np.array_equal(first, second)
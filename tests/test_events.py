@@ -0,0 +1,121 @@
+import threading
+
+import metrics
+from events import EventBus, format_sse
+
+
+def drain(subscriber):
+    events = []
+    while True:
+        event = subscriber.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_live_events_are_delivered_in_order():
+    bus = EventBus()
+    subscriber = bus.subscribe()
+    for i in range(3):
+        bus.publish("sos", {"i": i})
+    assert [e["id"] for e in drain(subscriber)] == [1, 2, 3]
+
+
+def test_replay_is_not_limited_by_client_buffer():
+    bus = EventBus(replay_size=10, client_buffer_size=2)
+    for i in range(5):
+        bus.publish("sos", {"i": i})
+    subscriber = bus.subscribe(last_event_id=1)
+    assert [e["id"] for e in drain(subscriber)] == [2, 3, 4, 5]
+    assert subscriber.dropped == 0
+
+
+def test_replay_reports_events_that_aged_out_of_the_ring():
+    bus = EventBus(replay_size=3, client_buffer_size=2)
+    for i in range(5):
+        bus.publish("sos", {"i": i})
+    events = drain(bus.subscribe(last_event_id=0))
+    assert events[0]["type"] == "gap"
+    assert events[0]["data"] == {"missed": 2}
+    assert [e["id"] for e in events[1:]] == [3, 4, 5]
+
+
+def test_client_from_before_a_restart_gets_gap_and_full_ring():
+    bus = EventBus()
+    for i in range(3):
+        bus.publish("sos", {"i": i})
+    events = drain(bus.subscribe(last_event_id=500))
+    assert events[0]["type"] == "gap"
+    assert events[0]["data"] == {"missed": None}
+    assert [e["id"] for e in events[1:]] == [1, 2, 3]
+
+
+def test_client_from_before_a_restart_gets_gap_when_ring_is_empty():
+    events = drain(EventBus().subscribe(last_event_id=7))
+    assert [e["type"] for e in events] == ["gap"]
+
+
+def test_up_to_date_client_gets_no_replay_or_gap():
+    bus = EventBus(replay_size=3)
+    for i in range(5):
+        bus.publish("sos", {"i": i})
+    assert drain(bus.subscribe(last_event_id=5)) == []
+
+
+def test_slow_client_drops_oldest_and_is_told_about_the_gap():
+    bus = EventBus(client_buffer_size=2)
+    subscriber = bus.subscribe()
+    for i in range(5):
+        bus.publish("sos", {"i": i})
+    events = drain(subscriber)
+    assert events[0]["type"] == "gap"
+    assert events[0]["data"] == {"missed": 3}
+    assert [e["id"] for e in events[1:]] == [4, 5]
+    assert subscriber.dropped == 3
+
+
+def test_buffer_overflow_is_counted_in_metrics(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    bus = EventBus(client_buffer_size=2)
+    bus.subscribe()
+    for i in range(5):
+        bus.publish("sos", {"i": i})
+    assert registry.counters == {"events_dropped": 3}
+
+
+def test_concurrent_publishers_deliver_in_id_order():
+    bus = EventBus(client_buffer_size=10000)
+    subscriber = bus.subscribe()
+
+    def publish_many():
+        for _ in range(500):
+            bus.publish("recognition", {})
+
+    threads = [threading.Thread(target=publish_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [e["id"] for e in drain(subscriber)]
+    assert ids == list(range(1, 2001))
+
+
+def test_unsubscribed_client_stops_receiving():
+    bus = EventBus()
+    subscriber = bus.subscribe()
+    bus.unsubscribe(subscriber)
+    bus.publish("sos", {})
+    assert bus.subscriber_count() == 0
+    assert subscriber.get(timeout=0) is None
+
+
+def test_format_sse_omits_id_for_gap_events():
+    bus = EventBus(replay_size=1)
+    event = bus.publish("sos", {"status": "triggered"})
+    assert format_sse(event) == 'id: 1\nevent: sos\ndata: {"status": "triggered"}\n\n'
+    bus.publish("sos", {})
+    gap = drain(bus.subscribe(last_event_id=0))[0]
+    assert format_sse(gap).startswith("event: gap\n")
@@ -0,0 +1,52 @@
+from face_core import FaceTracker
+
+
+def box(x, y, size=40):
+    """(top, right, bottom, left) of a square face centred on (x, y)."""
+    half = size // 2
+    return (y - half, x + half, y + half, x - half)
+
+
+def test_nearby_face_keeps_its_track_id():
+    tracker = FaceTracker(max_distance=80)
+    first = tracker.update([box(100, 100), box(400, 100)])
+    second = tracker.update([box(410, 105), box(110, 95)])
+    assert first == [1, 2]
+    assert second == [2, 1]
+
+
+def test_face_beyond_max_distance_gets_a_new_track():
+    tracker = FaceTracker(max_distance=50)
+    tracker.update([box(100, 100)])
+    assert tracker.update([box(300, 100)]) == [2]
+
+
+def test_track_expires_after_max_missed_frames():
+    tracker = FaceTracker(max_missed=2)
+    tracker.update([box(100, 100)])
+    tracker.update([])
+    tracker.update([])
+    assert 1 in tracker.tracks
+    tracker.update([])
+    assert 1 not in tracker.tracks
+    assert tracker.update([box(100, 100)]) == [2]
+
+
+def test_missed_frames_reset_when_face_returns():
+    tracker = FaceTracker(max_missed=2)
+    tracker.update([box(100, 100)])
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([box(100, 100)]) == [1]
+    tracker.update([])
+    tracker.update([])
+    assert 1 in tracker.tracks
+
+
+def test_identity_changed_only_on_new_or_different_name():
+    tracker = FaceTracker()
+    track_id = tracker.update([box(100, 100)])[0]
+    assert tracker.identity_changed(track_id, "Unknown")
+    assert not tracker.identity_changed(track_id, "Unknown")
+    assert tracker.identity_changed(track_id, "alice")
+    assert not tracker.identity_changed(track_id, "alice")
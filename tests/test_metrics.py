@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import Histogram, Registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    return registry
+
+
+def test_histogram_places_values_in_upper_bound_bucket():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]  # le=0.1 is inclusive, last slot is +Inf
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_histogram_merge_adds_counts():
+    first, second = Histogram(buckets=(0.1, 1.0)), Histogram(buckets=(0.1, 1.0))
+    first.observe(0.05)
+    second.observe(0.5)
+    second.observe(5.0)
+    first.merge(second.to_dict())
+    assert first.counts == [1, 1, 1]
+    assert first.count == 3
+    assert first.sum == pytest.approx(5.55)
+
+
+def test_histogram_merge_rejects_different_buckets():
+    with pytest.raises(ValueError):
+        Histogram(buckets=(0.1, 1.0)).merge(Histogram(buckets=(0.5,)).to_dict())
+
+
+def test_registry_merge_combines_stages_and_counters():
+    parent, child = Registry(), Registry()
+    parent.observe("detect", 0.02)
+    parent.inc("faces_matched")
+    child.observe("detect", 0.03)
+    child.observe("encode", 0.2)
+    child.inc("faces_matched", 2)
+    child.inc("capture_failures")
+
+    parent.merge(json.loads(json.dumps(child.to_dict())))
+
+    data = parent.to_dict()
+    assert data["stages"]["detect"]["count"] == 2
+    assert data["stages"]["encode"]["count"] == 1
+    assert data["counters"] == {"faces_matched": 3, "capture_failures": 1}
+
+
+def test_render_prometheus_uses_cumulative_buckets():
+    registry = Registry()
+    registry.stages["detect"] = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        registry.observe("detect", value)
+    registry.inc("faces_matched", 4)
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert "# TYPE firelinx_stage_seconds histogram" in lines
+    assert 'firelinx_stage_seconds_bucket{stage="detect",le="0.1"} 1' in lines
+    assert 'firelinx_stage_seconds_bucket{stage="detect",le="1.0"} 2' in lines
+    assert 'firelinx_stage_seconds_bucket{stage="detect",le="+Inf"} 3' in lines
+    assert 'firelinx_stage_seconds_count{stage="detect"} 3' in lines
+    assert "# HELP firelinx_faces_matched_total Faces matched to a known person." in lines
+    assert "# TYPE firelinx_faces_matched_total counter" in lines
+    assert "firelinx_faces_matched_total 4" in lines
+
+
+def test_timer_and_inc_record_into_registry(registry):
+    with metrics.timer("match"):
+        pass
+    metrics.inc("faces_unknown")
+    data = registry.to_dict()
+    assert data["stages"]["match"]["count"] == 1
+    assert data["counters"] == {"faces_unknown": 1}
+
+
+def test_timer_records_when_block_raises(registry):
+    with pytest.raises(RuntimeError):
+        with metrics.timer("encode"):
+            raise RuntimeError
+    assert registry.to_dict()["stages"]["encode"]["count"] == 1
+
+
+def test_disabled_metrics_record_nothing(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    with metrics.timer("detect"):
+        pass
+    metrics.inc("faces_matched")
+    assert registry.to_dict() == {"stages": {}, "counters": {}}
+
+
+def test_merge_file_round_trips_a_dump(registry, tmp_path):
+    source = Registry()
+    source.observe("sos_request", 1.5)
+    source.inc("events_published", 2)
+    path = tmp_path / "metrics.json"
+    path.write_text(json.dumps(source.to_dict()))
+
+    metrics.merge_file(str(path))
+
+    assert registry.to_dict() == source.to_dict()